@@ -4,15 +4,16 @@ import argparse
 import asyncio
 import datetime
 import logging
+import sys
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from zoneinfo import ZoneInfo
 
-import pytz
 import uvicorn
-from fastapi import BackgroundTasks, FastAPI
+from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from pydantic import ValidationError
 
 from app.docs import authenticate_docs, health_docs, readme_docs
@@ -20,7 +21,7 @@ from app.exceptions.base import PESUAcademyError
 from app.models import RequestModel, ResponseModel
 from app.pesu import PESUAcademy
 
-IST = pytz.timezone("Asia/Kolkata")
+IST = ZoneInfo("Asia/Kolkata")
 CSRF_TOKEN_REFRESH_INTERVAL_SECONDS = 45 * 60
 CSRF_TOKEN_REFRESH_LOCK = asyncio.Lock()
 
@@ -50,6 +51,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Startup
     logging.info("PESUAuth API startup")
 
+    # Build the OpenAPI schema eagerly so the first request to the docs does not pay for it
+    app.openapi()
+    logging.info("Generated and cached the OpenAPI schema.")
+
+    # Run new tasks eagerly, so a background CSRF prefetch is already on the wire before the request that scheduled it
+    # returns. The eager task factory is only available from Python 3.12 onwards.
+    loop = asyncio.get_running_loop()
+    previous_task_factory = loop.get_task_factory()
+    if sys.version_info >= (3, 12):
+        loop.set_task_factory(asyncio.eager_task_factory)
+        logging.info("Enabled the eager asyncio task factory.")
+
     # Prefetch PESUAcademy client for first request
     await pesu_academy.prefetch_client_with_csrf_token()
     logging.info("Prefetched a new PESUAcademy client with an unauthenticated CSRF token.")
@@ -70,6 +83,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         logging.exception("Failed to cancel unauthenticated CSRF token refresh background task.")
 
     await pesu_academy.close_client()
+    loop.set_task_factory(previous_task_factory)
     logging.info("PESUAuth API shutdown.")
 
 
@@ -116,7 +130,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(PESUAcademyError)
 async def pesu_exception_handler(request: Request, exc: PESUAcademyError) -> JSONResponse:
     """Handler for PESUAcademy specific errors."""
-    logging.exception(f"PESUAcademyError: {exc.message}")
+    logging.exception("PESUAcademyError: %s", exc.message)
     return JSONResponse(
         status_code=exc.status_code,
         content={
@@ -180,7 +194,7 @@ async def readme() -> RedirectResponse:
     responses=authenticate_docs.response_examples,
     tags=["Authentication"],
 )
-async def authenticate(payload: RequestModel, background_tasks: BackgroundTasks) -> JSONResponse:
+async def authenticate(payload: RequestModel) -> Response:
     """Authenticate a user using their PESU credentials via the PESU Academy service.
 
     Request body parameters:
@@ -198,7 +212,7 @@ async def authenticate(payload: RequestModel, background_tasks: BackgroundTasks)
 
     # Authenticate the user
     authentication_result = {"timestamp": current_time}
-    logging.info(f"Authenticating user={username} with PESU Academy...")
+    logging.info("Authenticating user=%s with PESU Academy...", username)
     authentication_result.update(
         await pesu_academy.authenticate(
             username=username,
@@ -207,26 +221,27 @@ async def authenticate(payload: RequestModel, background_tasks: BackgroundTasks)
             fields=fields,
         ),
     )
-    # Prefetch a new client with an unauthenticated CSRF token for the next request
-    background_tasks.add_task(_refresh_csrf_token_with_lock)
+    # No prefetch is scheduled here: handing out the cached client already started the prefetch for the next request
 
     # Validate the response
     try:
-        authentication_result = ResponseModel.model_validate(authentication_result)
-        logging.info(f"Returning auth result for user={username}: {authentication_result}")
-        authentication_result = authentication_result.model_dump(exclude_none=True)
-        authentication_result["timestamp"] = current_time.isoformat()
-        return JSONResponse(
-            status_code=200,
-            content=authentication_result,
-        )
+        response = ResponseModel.model_validate(authentication_result)
     except ValidationError:
-        logging.exception(f"Validation error on ResponseModel for user={username}.")
+        logging.exception("Validation error on ResponseModel for user=%s.", username)
         raise PESUAcademyError(
             status_code=500,
             message="Internal Server Error. Please try again later.",
         )
 
+    # Serialize the validated model to a JSON string in pydantic-core (timestamp included) instead of via a dict
+    content = response.model_dump_json(exclude_none=True)
+    logging.info("Returning auth result for user=%s: %s", username, content)
+    return Response(
+        status_code=200,
+        content=content,
+        media_type="application/json",
+    )
+
 
 def main() -> None:
     """Main function to run the FastAPI application with command line arguments."""
@@ -3,7 +3,7 @@
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ApiDocs:
     """Represents the base API documentation class holding example requests and responses."""
 
@@ -8,7 +8,7 @@ from pydantic import BaseModel, ConfigDict, Field
 class ProfileModel(BaseModel):
     """Model representing the user's profile data returned after successful authentication."""
 
-    model_config = ConfigDict(strict=True)
+    model_config = ConfigDict(strict=True, frozen=True)
 
     name: str | None = Field(
         None,
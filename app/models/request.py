@@ -10,7 +10,7 @@ from app.pesu import PESUAcademy
 class RequestModel(BaseModel):
     """Model representing the student's authentication request."""
 
-    model_config = ConfigDict(strict=True)
+    model_config = ConfigDict(strict=True, frozen=True)
 
     username: str = Field(
         ...,
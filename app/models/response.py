@@ -10,7 +10,7 @@ from app.models import ProfileModel
 class ResponseModel(BaseModel):
     """Model representing the response after a student's authentication request."""
 
-    model_config = ConfigDict(strict=True)
+    model_config = ConfigDict(strict=True, frozen=True)
 
     status: bool = Field(
         ...,
@@ -1,13 +1,15 @@
 """PESUAcademy class that serves as an interface to the PESU Academy website."""
 
 import asyncio
+import ipaddress
 import logging
 import re
-from datetime import datetime
+import time
+import urllib.request
 from typing import Any
 
 import httpx
-from selectolax.parser import HTMLParser, Node
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 from app.exceptions.authentication import (
     AuthenticationError,
@@ -16,6 +18,23 @@ from app.exceptions.authentication import (
     ProfileParseError,
 )
 
+# CSS selectors used to locate data in the PESU Academy pages
+CSRF_TOKEN_SELECTOR = "meta[name='csrf-token']"
+LOGIN_FORM_SELECTOR = "div.login-form"
+PROFILE_DETAILS_CONTAINER_SELECTOR = "div.elem-info-wrapper"
+PROFILE_DETAILS_NODE_SELECTOR = "div.form-group"
+# Matches the key label and its adjacent value label of a profile field, in document order
+PROFILE_FIELD_LABELS_SELECTOR = "label.lbl-title-light, label.lbl-title-light + label"
+PROFILE_EMAIL_SELECTOR = "#updateMail"
+PROFILE_PHONE_SELECTOR = "#updateContact"
+
+# Fast paths for inspecting raw pages without building a DOM
+LOGIN_FORM_MARKER = b"login-form"
+CSRF_TOKEN_PATTERN = re.compile(rb"""<meta\s+name=["']csrf-token["']\s+content=["']([\w-]+)["']""")
+
+# Pages smaller than this are parsed inline, since a thread hop costs more than parsing them
+HTML_PARSE_IN_THREAD_THRESHOLD_BYTES = 200_000
+
 
 class PESUAcademy:
     """Class to interact with the PESU Academy server.
@@ -23,18 +42,19 @@ class PESUAcademy:
     This class provides methods to authenticate users, fetch profile information, and handle CSRF token management.
 
     Attributes:
-        DEFAULT_FIELDS (list[str]): The default fields to fetch from the profile page.
+        DEFAULT_FIELDS (tuple[str, ...]): The default fields to fetch from the profile page.
         PROFILE_PAGE_HEADER_TO_KEY_MAP (dict[str, str]): A mapping of profile page headers to the corresponding keys
         in the profile dictionary.
+        CAMPUS_CODE_TO_CAMPUS_MAP (dict[str, str]): A mapping of the campus code in a PRN to the campus abbreviation.
 
     Methods:
         prefetch_client_with_csrf_token: Prefetch a new client with an unauthenticated CSRF token.
-        close_client: Close the internal client if it exists.
+        close_client: Cancel any in-flight prefetch and close the internal client and the shared connection pools.
         get_profile_information: Get the profile information of the user.
         authenticate: Authenticate the user with the provided username and password.
     """
 
-    DEFAULT_FIELDS: list[str] = [
+    DEFAULT_FIELDS: tuple[str, ...] = (
         "name",
         "prn",
         "srn",
@@ -46,7 +66,8 @@ class PESUAcademy:
         "phone",
         "campus_code",
         "campus",
-    ]
+    )
+    _DEFAULT_FIELDS_SET: frozenset[str] = frozenset(DEFAULT_FIELDS)
 
     PROFILE_PAGE_HEADER_TO_KEY_MAP = {
         "Name": "name",
@@ -58,24 +79,135 @@ class PESUAcademy:
         "Section": "section",
     }
 
-    def __init__(self) -> None:
-        """Initialize the PESUAcademy class."""
+    CAMPUS_CODE_TO_CAMPUS_MAP = {
+        "1": "RR",
+        "2": "EC",
+    }
+
+    # Constant part of the student profile page query string; only the cache-busting "_" timestamp varies per call
+    _PROFILE_QUERY_BASE = {
+        "menuId": "670",
+        "url": "studentProfilePESUAdmin",
+        "controllerMode": "6414",
+        "actionType": "5",
+        "id": "0",
+        "selectedData": "0",
+    }
+
+    def __init__(self, max_connections: int = 128, max_keepalive_connections: int = 64) -> None:
+        """Initialize the PESUAcademy class.
+
+        All clients share one connection pool, so the connection limits apply to the whole process rather than to a
+        single login. Once max_connections upstream requests are in flight, further requests wait for a free
+        connection for up to the client timeout and then fail with httpx.PoolTimeout, so size the limits for the
+        expected number of concurrent logins.
+
+        Args:
+            max_connections (int, optional): Maximum number of concurrent connections to PESU Academy across all
+            clients. Defaults to 128.
+            max_keepalive_connections (int, optional): Maximum number of idle connections kept open for reuse.
+            Defaults to 64.
+        """
         self._csrf_token: str | None = None
         self._client: httpx.AsyncClient | None = None
         self._csrf_lock = asyncio.Lock()
+        # Handle on the in-flight background prefetch, so concurrent callers share it instead of starting duplicates
+        self._prefetch_task: asyncio.Task | None = None
+        # Connection pool shared by all clients. Each client keeps its own cookie jar (and therefore its own PESU
+        # Academy session), but TCP/TLS connections are reused across clients instead of being re-established per login
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self._transport = httpx.AsyncHTTPTransport(limits=limits)
+        # httpx ignores proxy environment variables once an explicit transport is passed, so they are resolved here
+        # and mounted on every client. A None mount routes to the shared transport.
+        self._mounts: dict[str, httpx.AsyncHTTPTransport | None] = {
+            pattern: None if url is None else httpx.AsyncHTTPTransport(proxy=url, limits=limits)
+            for pattern, url in self._get_proxy_mount_urls().items()
+        }
+
+    @staticmethod
+    def _get_proxy_mount_urls() -> dict[str, str | None]:
+        """Resolve the proxy settings of the environment into httpx mount patterns.
+
+        This follows httpx's own handling of HTTP_PROXY, HTTPS_PROXY, ALL_PROXY and NO_PROXY, which it only applies to
+        clients without an explicit transport.
+
+        Returns:
+            dict[str, str | None]: The proxy URL for each mount pattern, or None for hosts that bypass the proxy.
+        """
+        proxies = urllib.request.getproxies()
+        mount_urls: dict[str, str | None] = {}
+        for scheme in ("http", "https", "all"):
+            if url := proxies.get(scheme):
+                mount_urls[f"{scheme}://"] = url if "://" in url else f"http://{url}"
+
+        for host in (host.strip() for host in proxies.get("no", "").split(",")):
+            if host == "*":
+                return {}
+            if not host:
+                continue
+            if "://" in host:
+                mount_urls[host] = None
+                continue
+            try:
+                address = ipaddress.ip_address(host)
+            except ValueError:
+                # Domain names also match their subdomains, except for localhost
+                mount_urls[f"all://{host}" if host.lower() == "localhost" else f"all://*{host}"] = None
+            else:
+                mount_urls[f"all://[{host}]" if address.version == 6 else f"all://{host}"] = None
+        return mount_urls
+
+    @staticmethod
+    async def _parse_html(content: bytes | str) -> LexborHTMLParser:
+        """Parse an HTML document, offloading it to a worker thread only if it is large.
+
+        Raw bytes are enough for pages where only ASCII attributes such as the CSRF token are read. Pages whose text is
+        extracted should be passed as response.text, so that httpx decodes them with the charset from Content-Type.
+
+        Args:
+            content (bytes | str): The raw or decoded HTML document.
+
+        Returns:
+            LexborHTMLParser: The parsed document.
+        """
+        if len(content) < HTML_PARSE_IN_THREAD_THRESHOLD_BYTES:
+            return LexborHTMLParser(content)
+        return await asyncio.to_thread(LexborHTMLParser, content)
 
     @staticmethod
-    async def _fetch_new_client_with_csrf_token() -> tuple[httpx.AsyncClient, str]:
+    def _search_csrf_token(content: bytes) -> str | None:
+        """Search for the CSRF token meta tag in a raw HTML document.
+
+        Args:
+            content (bytes): The raw HTML document.
+
+        Returns:
+            str | None: The CSRF token, or None if the meta tag was not found in the expected form.
+        """
+        if match := CSRF_TOKEN_PATTERN.search(content):
+            return match.group(1).decode()
+        return None
+
+    async def _fetch_new_client_with_csrf_token(self) -> tuple[httpx.AsyncClient, str]:
         """Initialize a fresh client with an unauthenticated CSRF token from PESU Academy."""
         logging.info("Fetching a new client with an unauthenticated CSRF token...")
-        # Create a new client
-        client = httpx.AsyncClient(follow_redirects=True, timeout=10.0)
+        # Create a new client on top of the shared connection pool
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=10.0,
+            transport=self._transport,
+            mounts=self._mounts,
+        )
         # Fetch the CSRF token
         resp = await client.get("https://www.pesuacademy.com/Academy/")
-        soup = await asyncio.to_thread(HTMLParser, resp.text)
-        if node := soup.css_first("meta[name='csrf-token']"):
+        if csrf_token := self._search_csrf_token(resp.content):
+            logging.info("Fetched CSRF token: %s", csrf_token)
+            return client, csrf_token
+        # Fall back to parsing the page if the meta tag is not in the expected form
+        soup = await self._parse_html(resp.content)
+        if node := soup.css_first(CSRF_TOKEN_SELECTOR):
             csrf_token = node.attributes["content"]
-            logging.info(f"Fetched CSRF token: {csrf_token}")
+            logging.info("Fetched CSRF token: %s", csrf_token)
             return client, csrf_token
         raise CSRFTokenError("CSRF token not found in the pre-authentication response.")
 
@@ -89,14 +221,22 @@ class PESUAcademy:
         logging.info("Prefetching a new client with an unauthenticated CSRF token...")
         client, token = await self._fetch_new_client_with_csrf_token()
         async with self._csrf_lock:
-            # Close old cached client (if any) to avoid leaks
-            if self._client is not None:
-                await self._client.aclose()
-            # Store the new cached client/token
+            # Store the new cached client/token. The old cached client (if any) is dropped rather than closed,
+            # since closing it would close the shared connection pool
             self._client = client
             self._csrf_token = token
         logging.info("Cache refreshed with new unauthenticated CSRF token.")
 
+    def _schedule_prefetch_client_with_csrf_token(self) -> asyncio.Task:
+        """Start a background prefetch of a new client, unless one is already in flight.
+
+        Returns:
+            asyncio.Task: The in-flight prefetch task.
+        """
+        if self._prefetch_task is None or self._prefetch_task.done():
+            self._prefetch_task = asyncio.create_task(self._prefetch_client_with_csrf_token(), name="csrf-prefetch")
+        return self._prefetch_task
+
     async def _get_client_with_csrf_token(self) -> tuple[httpx.AsyncClient, str]:
         """Get the client with the cached CSRF token.
 
@@ -104,6 +244,15 @@ class PESUAcademy:
         It is used to avoid the overhead of fetching a new client with an unauthenticated CSRF token
         for each request.
         """
+        # If the cache is empty but a prefetch is already in flight, wait for it instead of fetching a duplicate.
+        # The prefetch is shielded so that cancelling this request does not cancel it for the next caller.
+        prefetch_task = self._prefetch_task
+        if not (self._client and self._csrf_token) and prefetch_task and not prefetch_task.done():
+            try:
+                await asyncio.shield(prefetch_task)
+            except Exception:
+                logging.warning("In-flight CSRF token prefetch failed, fetching a new client instead.")
+
         async with self._csrf_lock:
             # If cache is empty (first call), populate it
             if not (self._client and self._csrf_token):
@@ -118,30 +267,28 @@ class PESUAcademy:
             self._csrf_token = None
 
         # Kick off async prefetch for the *next* request (non-blocking)
-        asyncio.create_task(self._prefetch_client_with_csrf_token())
+        self._schedule_prefetch_client_with_csrf_token()
         # Return a dedicated client/token for this request
         return client_to_use, token_to_use
 
-    def _extract_and_update_profile(self, node: Node, idx: int, profile: dict) -> None:
+    def _extract_and_update_profile(self, node: LexborNode, idx: int, profile: dict) -> None:
         """Extract the profile data from a node and update the profile dictionary.
 
         Args:
-            node (Node): Pre-parsed node containing the profile information
+            node (LexborNode): Pre-parsed node containing the profile information
             idx (int): Index of the node
             profile (dict): The profile dictionary to update in-place
         """
-        # Use the selector `label.lbl-title-light` to find the key label
-        if not (key_node := node.css_first("label.lbl-title-light")) or not (key := key_node.text(strip=True)):
+        # Fetch the key label and the adjacent value label in a single traversal of the node
+        labels = node.css(PROFILE_FIELD_LABELS_SELECTOR)
+        if not labels or not (key := labels[0].text(strip=True)):
             raise ProfileParseError(f"Could not parse key for field at index {idx}.")
-        # Use the adjacent sibling selector `+` to find value label
-        if not (value_node := node.css_first("label.lbl-title-light + label")) or not (
-            value := value_node.text(strip=True)
-        ):
+        if len(labels) < 2 or not (value := labels[1].text(strip=True)):
             raise ProfileParseError(f"Could not parse value for field at index {idx}.")
-        logging.debug(f"Extracted key: '{key}' with value: '{value}' at index {idx}.")
+        logging.debug("Extracted key: '%s' with value: '%s' at index %d.", key, value, idx)
         # If the key is in the map, add it to the profile
         if mapped_key := self.PROFILE_PAGE_HEADER_TO_KEY_MAP.get(key):
-            logging.debug(f"Adding key: '{mapped_key}', value: '{value}' to profile...")
+            logging.debug("Adding key: '%s', value: '%s' to profile...", mapped_key, value)
             profile[mapped_key] = value
         else:
             raise ProfileParseError(
@@ -153,19 +300,31 @@ class PESUAcademy:
 
         This method is used to prefetch a new client with an unauthenticated CSRF token.
         It is used to avoid the overhead of fetching a new client with an unauthenticated CSRF token
-        for each request.
+        for each request. If a prefetch is already in flight, this waits for it instead of starting another one.
         """
-        await self._prefetch_client_with_csrf_token()
+        await asyncio.shield(self._schedule_prefetch_client_with_csrf_token())
 
     async def close_client(self) -> None:
-        """Public method to close the internal client if it exists.
+        """Public method to close the internal client and the shared connection pool.
 
-        This method is used to close the internal client if it exists.
-        It is used to avoid the overhead of closing the client for each request.
+        This method is used to cancel any in-flight prefetch, drop the cached client and close the connection pool
+        shared by all clients. It is meant to be called once on shutdown, since individual clients are never closed.
         """
-        if self._client is not None:
-            await self._client.aclose()
-            self._client = None
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+            try:
+                await self._prefetch_task
+            except asyncio.CancelledError:
+                logging.debug("In-flight CSRF token prefetch cancelled.")
+            except Exception:
+                logging.exception("In-flight CSRF token prefetch failed during shutdown.")
+        self._prefetch_task = None
+        self._client = None
+        self._csrf_token = None
+        await self._transport.aclose()
+        for transport in self._mounts.values():
+            if transport is not None:
+                await transport.aclose()
 
     async def get_profile_information(
         self,
@@ -182,17 +341,9 @@ class PESUAcademy:
             dict[str, Any]: A dictionary containing the user's profile information.
         """
         # Fetch the profile data from the student profile page
-        logging.info(f"Fetching profile data for user={username} from the student profile page...")
+        logging.info("Fetching profile data for user=%s from the student profile page...", username)
         profile_url = "https://www.pesuacademy.com/Academy/s/studentProfilePESUAdmin"
-        query = {
-            "menuId": "670",
-            "url": "studentProfilePESUAdmin",
-            "controllerMode": "6414",
-            "actionType": "5",
-            "id": "0",
-            "selectedData": "0",
-            "_": str(int(datetime.now().timestamp() * 1000)),
-        }
+        query = {**self._PROFILE_QUERY_BASE, "_": str(time.time_ns() // 1_000_000)}
         response = await client.get(profile_url, params=query)
         # If the status code is not 200, raise an exception because the profile page is not accessible
         if response.status_code != 200:
@@ -201,12 +352,12 @@ class PESUAcademy:
             )
         logging.debug("Student profile page fetched successfully.")
 
-        # Parse the response text
-        soup = await asyncio.to_thread(HTMLParser, response.text)
+        # Parse the response text, decoded by httpx with the page's charset since the profile values are read as text
+        soup = await self._parse_html(response.text)
         # Get the details container and its nodes where the profile information is stored
         if (
-            not (details_container := soup.css_first("div.elem-info-wrapper"))
-            or not (details_nodes := details_container.css("div.form-group"))
+            not (details_container := soup.css_first(PROFILE_DETAILS_CONTAINER_SELECTOR))
+            or not (details_nodes := details_container.css(PROFILE_DETAILS_NODE_SELECTOR))
             or len(details_nodes) < 7
         ):
             raise ProfileParseError(
@@ -216,41 +367,41 @@ class PESUAcademy:
 
         # Extract the profile information from the profile page
         profile: dict[str, Any] = {}
-        for i in range(7):
-            self._extract_and_update_profile(details_nodes[i], i, profile)
+        for i, node in enumerate(details_nodes[:7]):
+            self._extract_and_update_profile(node, i, profile)
 
         # Get the email and phone number from the profile page
         if (
-            (email_node := soup.css_first("#updateMail"))
+            (email_node := soup.css_first(PROFILE_EMAIL_SELECTOR))
             and (email_value := email_node.attributes.get("value"))
             and isinstance(email_value, str)
         ):
             profile["email"] = email_value.strip()
 
         if (
-            (phone_node := soup.css_first("#updateContact"))
+            (phone_node := soup.css_first(PROFILE_PHONE_SELECTOR))
             and (phone_value := phone_node.attributes.get("value"))
             and isinstance(phone_value, str)
         ):
             profile["phone"] = phone_value.strip()
 
-        # If username starts with PES1, then they are from RR campus, else if it is PES2, then EC campus
-        if profile.get("prn") and (campus_code_match := re.match(r"PES(\d)", profile["prn"])):
-            campus_code = campus_code_match.group(1)
+        # The campus code is the digit right after the PES prefix of the PRN, e.g. PES1... is RR and PES2... is EC
+        if (prn := profile.get("prn")) and prn.startswith("PES") and (campus_code := prn[3:4]).isdecimal():
             profile["campus_code"] = int(campus_code)
-            if campus_code == "1":
-                profile["campus"] = "RR"
-            elif campus_code == "2":
-                profile["campus"] = "EC"
+            if campus := self.CAMPUS_CODE_TO_CAMPUS_MAP.get(campus_code):
+                profile["campus"] = campus
             else:
                 logging.warning(
-                    f"Unknown campus code: {campus_code} parsed from PRN={profile['prn']} for user={username}",
+                    "Unknown campus code: %s parsed from PRN=%s for user=%s",
+                    campus_code,
+                    prn,
+                    username,
                 )
 
         # Check if we extracted any profile data
         if not profile:
             raise ProfileParseError(f"No profile data could be extracted for user={username}.")
-        logging.info(f"Complete profile information retrieved for user={username}: {profile}.")
+        logging.info("Complete profile information retrieved for user=%s: %s.", username, profile)
 
         return profile
 
@@ -274,18 +425,20 @@ class PESUAcademy:
             dict[str, Any]: A dictionary containing the authentication status, message,
             and optionally the profile information.
         """
-        # Default fields to fetch if fields is not provided
-        fields = self.DEFAULT_FIELDS if fields is None else fields
-        # Check if fields is not the default fields and enable field filtering
-        field_filtering = fields != self.DEFAULT_FIELDS
+        # Enable field filtering only if a subset of the default fields was requested
+        requested_fields = None if fields is None else frozenset(fields)
+        field_filtering = requested_fields is not None and requested_fields != self._DEFAULT_FIELDS_SET
 
         logging.info(
-            f"Connecting to PESU Academy with user={username}, profile={profile}, fields={fields} ...",
+            "Connecting to PESU Academy with user=%s, profile=%s, fields=%s ...",
+            username,
+            profile,
+            fields,
         )
 
         # Get a pre-fetched csrf token and client
         client, csrf_token = await self._get_client_with_csrf_token()
-        logging.debug(f"Using cached CSRF token for user={username}.")
+        logging.debug("Using cached CSRF token for user=%s.", username)
 
         # Prepare the login data for auth call
         data = {
@@ -298,43 +451,51 @@ class PESUAcademy:
         # Make a post request to authenticate the user
         auth_url = "https://www.pesuacademy.com/Academy/j_spring_security_check"
         response = await client.post(auth_url, data=data)
-        soup = await asyncio.to_thread(HTMLParser, response.text)
+        content = response.content
         logging.debug("Authentication response received.")
 
-        # If class login-form is present, login failed
-        if soup.css_first("div.login-form"):
-            # Log the error and return the error message
-            raise AuthenticationError(
-                f"Invalid username or password, or user does not exist for user={username}.",
-            )
+        # If class login-form is present, login failed. The page is only parsed to confirm this if the class name
+        # occurs in the raw response at all, so a successful login is usually never parsed.
+        soup: LexborHTMLParser | None = None
+        if LOGIN_FORM_MARKER in content:
+            soup = await self._parse_html(content)
+            if soup.css_first(LOGIN_FORM_SELECTOR):
+                # Log the error and return the error message
+                raise AuthenticationError(
+                    f"Invalid username or password, or user does not exist for user={username}.",
+                )
 
         # If the user is successfully authenticated
-        logging.info(f"Login successful for user={username}.")
+        logging.info("Login successful for user=%s.", username)
         status = True
-        # Get the newly authenticated csrf token
-        if csrf_node := soup.css_first("meta[name='csrf-token']"):
-            csrf_token = csrf_node.attributes.get("content")
-            logging.debug(f"Authenticated CSRF token: {csrf_token}")
-        else:
-            raise CSRFTokenError(
-                f"CSRF token not found in the post-authentication response for user={username}.",
-            )
+        # Get the newly authenticated csrf token, falling back to the parsed page if the fast path misses
+        if not (csrf_token := self._search_csrf_token(content)):
+            if soup is None:
+                soup = await self._parse_html(content)
+            if csrf_node := soup.css_first(CSRF_TOKEN_SELECTOR):
+                csrf_token = csrf_node.attributes.get("content")
+            else:
+                raise CSRFTokenError(
+                    f"CSRF token not found in the post-authentication response for user={username}.",
+                )
+        logging.debug("Authenticated CSRF token: %s", csrf_token)
 
         result = {"status": status, "message": "Login successful."}
 
         if profile:
-            logging.info(f"Profile data requested for user={username}. Fetching profile data...")
+            logging.info("Profile data requested for user=%s. Fetching profile data...", username)
             # Fetch the profile information
             result["profile"] = await self.get_profile_information(client, username)
             # Filter the fields if field filtering is enabled
             if field_filtering:
-                result["profile"] = {key: value for key, value in result["profile"].items() if key in fields}
+                result["profile"] = {key: value for key, value in result["profile"].items() if key in requested_fields}
                 logging.info(
-                    f"Field filtering enabled. Filtered profile data for user={username}: {result['profile']}",
+                    "Field filtering enabled. Filtered profile data for user=%s: %s",
+                    username,
+                    result["profile"],
                 )
 
-        logging.info(f"Authentication process for user={username} completed successfully.")
+        logging.info("Authentication process for user=%s completed successfully.", username)
 
-        # Close the client and return the result
-        await client.aclose()
+        # The client is not closed: its connections go back to the shared pool for the next request
         return result
@@ -1,10 +1,53 @@
 """Script to benchmark the PESUAuth API."""
 
 import argparse
+import asyncio
+import csv
+import time
+from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import httpx
 from tqdm.auto import tqdm
-from util import make_request
+from util import make_async_request, make_request
+
+
+async def run_async_benchmark(
+    num_requests: int,
+    concurrency: int,
+    profile: bool,
+    host: str,
+    route: str,
+    timeout: float,
+    on_result: Callable[[dict, float], None],
+) -> None:
+    """Run the benchmark requests concurrently on a single event loop.
+
+    Each result is passed to on_result as soon as its request finishes, so nothing is buffered until the run ends.
+
+    Args:
+        num_requests (int): The number of requests to make.
+        concurrency (int): The maximum number of requests in flight at once.
+        profile (bool): Whether to fetch the profile information or not.
+        host (str): The host to make the requests to.
+        route (str): The route to make the requests to.
+        timeout (float): The timeout for each request.
+        on_result (Callable[[dict, float], None]): Called with the response and elapsed time of each request.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(follow_redirects=True, limits=limits) as client:
+
+        async def bounded_request() -> tuple[dict, float]:
+            async with semaphore:
+                return await make_async_request(client, host=host, route=route, profile=profile, timeout=timeout)
+
+        for future in asyncio.as_completed([bounded_request() for _ in range(num_requests)]):
+            try:
+                on_result(*await future)
+            except Exception as e:
+                print(f"Request failed: {e}")
+
 
 if __name__ == "__main__":
     """Main function to benchmark the PESUAuth API.
@@ -36,6 +79,12 @@ if __name__ == "__main__":
         action="store_true",
         help="Run the benchmark in parallel using threads",
     )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the benchmark concurrently on an asyncio event loop, with --max-workers requests in flight",
+    )
     parser.add_argument(
         "--host",
         type=str,
@@ -71,74 +120,85 @@ if __name__ == "__main__":
     num_requests = args.num_requests
     profile = not args.no_profile
     parallel = args.parallel
+    use_async = args.use_async
     host = args.host
     route = args.route
     timeout = args.timeout
     verbose = args.verbose
     output = args.output
 
-    success = []
-    times = []
-    if parallel:
-        print(
-            f"Running benchmark with max {max_workers} workers and {num_requests} requests in parallel...",
-        )
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(
-                    make_request,
-                    profile=profile,
-                    host=host,
-                    route=route,
-                    timeout=timeout,
-                )
-                for _ in range(num_requests)
-            ]
-            for future in as_completed(futures):
-                try:
-                    response, elapsed = future.result()
-                    times.append(elapsed)
-                    if verbose:
-                        print(f"Response: {response}")
-                    if response.get("status"):
-                        success.append(1)
-                    else:
-                        success.append(0)
-                except Exception as e:
-                    print(f"Request failed: {e}")
-    else:
-        print(f"Running benchmark with {num_requests} requests sequentially...")
-        for _ in tqdm(range(num_requests), desc="Processing requests"):
-            response, elapsed = make_request(
-                profile=profile,
-                host=host,
-                route=route,
-                timeout=timeout,
-            )
-            times.append(elapsed)
-            if verbose:
-                print(f"Response: {response}")
-            if response.get("status"):
-                success.append(1)
-            else:
-                success.append(0)
-
     outfile = (
         output
         if output
         else (
             f"benchmark_[num_requests={num_requests}]_[max_workers={max_workers}]_"
-            f"[parallel={parallel}]_[route={route}]_[timeout={timeout}].csv"
+            f"[parallel={parallel}]_[async={use_async}]_[route={route}]_[timeout={timeout}].csv"
         )
     )
 
-    with open(
-        outfile,
-        "w",
-    ) as f:
-        f.write("status,time\n")
-        f.writelines(f"{s},{t}\n" for s, t in zip(success, times, strict=False))
+    # Results are written as they arrive, so memory stays flat on long runs and a crashed run keeps its results
+    success_count, request_count, total_time = 0, 0, 0.0
+    with open(outfile, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("status", "time"))
+
+        def record_result(response: dict, elapsed: float) -> None:
+            """Write a single result to the output file and update the running totals."""
+            global success_count, request_count, total_time
+            status = 1 if response.get("status") else 0
+            writer.writerow((status, elapsed))
+            success_count += status
+            request_count += 1
+            total_time += elapsed
+            if verbose:
+                print(f"Response: {response}")
+
+        if use_async:
+            print(
+                f"Running benchmark with {num_requests} requests and max {max_workers} in flight using asyncio...",
+            )
+            wall_start_time = time.perf_counter()
+            asyncio.run(run_async_benchmark(num_requests, max_workers, profile, host, route, timeout, record_result))
+            wall_time = time.perf_counter() - wall_start_time
+            print(f"Wall-clock time: {wall_time:.2f} seconds")
+        elif parallel:
+            print(
+                f"Running benchmark with max {max_workers} workers and {num_requests} requests in parallel...",
+            )
+            # One client shared by all workers, with a connection pool large enough that no worker waits
+            limits = httpx.Limits(max_connections=max_workers, max_keepalive_connections=max_workers)
+            with (
+                httpx.Client(follow_redirects=True, limits=limits) as client,
+                ThreadPoolExecutor(max_workers=max_workers) as executor,
+            ):
+                futures = [
+                    executor.submit(
+                        make_request,
+                        profile=profile,
+                        host=host,
+                        route=route,
+                        timeout=timeout,
+                        client=client,
+                    )
+                    for _ in range(num_requests)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        record_result(*future.result())
+                    except Exception as e:
+                        print(f"Request failed: {e}")
+        else:
+            print(f"Running benchmark with {num_requests} requests sequentially...")
+            for _ in tqdm(range(num_requests), desc="Processing requests"):
+                record_result(
+                    *make_request(
+                        profile=profile,
+                        host=host,
+                        route=route,
+                        timeout=timeout,
+                    ),
+                )
 
-    print(f"Benchmark completed. Successful requests: {sum(success)} out of {len(success)}")
-    print(f"Average time per request: {sum(times) / len(times):.2f} seconds")
-    print(f"Total time taken: {sum(times):.2f} seconds")
+    print(f"Benchmark completed. Successful requests: {success_count} out of {request_count}")
+    print(f"Average time per request: {total_time / request_count:.2f} seconds")
+    print(f"Total time taken: {total_time:.2f} seconds")
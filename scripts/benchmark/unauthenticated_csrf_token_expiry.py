@@ -1,11 +1,10 @@
 """Script to test the unauthenticated CSRF token expiry."""
 
 import argparse
-import os
+import csv
 import time
 
-from tqdm.auto import tqdm
-from util import make_request
+from util import TEST_PRN, make_request
 
 
 def test_response(response: dict, no_profile: bool) -> bool:
@@ -20,7 +19,7 @@ def test_response(response: dict, no_profile: bool) -> bool:
     """
     if response.get("status"):
         if not no_profile:
-            return response.get("profile").get("prn") == os.getenv("TEST_PRN")
+            return response.get("profile").get("prn") == TEST_PRN
         return True
     return False
 
@@ -75,47 +74,35 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    request_count, success, times, waiting_times = (
-        0,
-        list(),
-        list(),
-        [args.start_delay * 60],
-    )
-
-    for _ in tqdm(
-        range(args.start_delay * 60),
-        desc=f"Waiting {args.start_delay} minutes before starting the benchmark",
-        leave=False,
-        unit="s",
-    ):
-        time.sleep(1)
+    if args.start_delay:
+        print(f"Waiting {args.start_delay} minutes before starting the benchmark...")
+        time.sleep(args.start_delay * 60)
 
-    while True:
-        request_count += 1
-        response, elapsed = make_request(
-            host=args.host,
-            timeout=args.timeout,
-            profile=not args.no_profile,
-            route="authenticate",
-        )
-        success.append(int(test_response(response, args.no_profile)))
-        times.append(elapsed)
-        if args.verbose:
-            print(f"Response: {response}")
+    # Each result is written and flushed as soon as it is known, since a run can last for days and would otherwise
+    # lose everything if the process is killed before it finishes
+    request_count, waiting_time = 0, args.start_delay * 60
+    with open(args.output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("status", "time", "waiting_time"))
+        f.flush()
 
-        if success[-1] == 0:
-            break
+        while True:
+            request_count += 1
+            response, elapsed = make_request(
+                host=args.host,
+                timeout=args.timeout,
+                profile=not args.no_profile,
+                route="authenticate",
+            )
+            status = int(test_response(response, args.no_profile))
+            writer.writerow((status, elapsed, waiting_time))
+            f.flush()
+            if args.verbose:
+                print(f"Response: {response}")
 
-        next_interval = args.interval * request_count * 60
-        for _ in tqdm(
-            range(next_interval),
-            desc=f"Waiting {next_interval / 60} minutes before next request",
-            leave=False,
-            unit="s",
-        ):
-            time.sleep(1)
-        waiting_times.append(next_interval)
+            if status == 0:
+                break
 
-    with open(args.output, "w") as f:
-        f.write("status,time,waiting_time\n")
-        f.writelines(f"{s},{t},{w}\n" for s, t, w in zip(success, times, waiting_times, strict=False))
+            waiting_time = args.interval * request_count * 60
+            print(f"Waiting {waiting_time / 60} minutes before next request...")
+            time.sleep(waiting_time)
@@ -2,6 +2,7 @@
 
 #!/usr/bin/env python3
 
+import importlib.util
 import logging
 import os
 import subprocess
@@ -10,6 +11,19 @@ import sys
 from dotenv import load_dotenv
 
 
+def run_pytest(command: list[str]) -> int:
+    """Run a single pytest command and return its exit code."""
+    try:
+        result = subprocess.run(command, check=False)
+        return result.returncode
+    except FileNotFoundError:
+        logging.exception("Error: pytest not found. Please ensure pytest is installed.")
+        return 1
+    except Exception:
+        logging.exception("Error running tests")
+        return 1
+
+
 def run_tests() -> int:
     """Run all the tests with coverage and return the exit code."""
     load_dotenv()
@@ -19,35 +33,58 @@ def run_tests() -> int:
 
     if not test_username or not test_password:
         logging.info("Secrets missing. Running only tests not requiring secrets...")
-        command = [
-            "pytest",
-            "-m",
-            "not secret_required",
-            "--disable-warnings",
-            "-v",
-            "-s",
-        ]
+        marker = "not secret_required"
+        coverage_args = []
+        report_args = []
     else:
         logging.info("Running all tests with coverage...")
-        command = [
-            "pytest",
-            "--cov=app",
-            "--cov-report=term-missing",
-            "--cov-fail-under=95",
-            "--disable-warnings",
-            "-v",
-            "-s",
-        ]
+        marker = ""
+        coverage_args = ["--cov=app"]
+        report_args = ["--cov-report=term-missing", "--cov-fail-under=95"]
+    common_args = ["--disable-warnings", "-v", "-s"]
 
-    try:
-        result = subprocess.run(command, check=False)
-        return result.returncode
-    except FileNotFoundError:
-        logging.exception("Error: pytest not found. Please ensure pytest is installed.")
-        return 1
-    except Exception:
-        logging.exception("Error running tests")
-        return 1
+    if not importlib.util.find_spec("xdist") or os.getenv("PYTEST_XDIST", "1") == "0":
+        command = ["pytest", *(["-m", marker] if marker else []), *coverage_args, *report_args, *common_args]
+        return run_pytest(command)
+
+    # With pytest-xdist, every worker runs its own copy of each session-scoped fixture. For the integration and
+    # secret-requiring tests that would mean one app lifespan and one real PESU Academy login per worker, so only the
+    # remaining tests are spread over all cores, and the rest run afterwards in a single serial process.
+    logging.info("pytest-xdist found. Running tests not needing shared fixtures in parallel...")
+    parallel_marker = "not integration and not secret_required"
+    serial_marker = f"integration and {marker}" if marker else "integration or secret_required"
+    parallel_command = [
+        "pytest",
+        "-n",
+        "auto",
+        "--dist",
+        "loadfile",
+        "-m",
+        parallel_marker,
+        *coverage_args,
+        *(["--cov-report="] if coverage_args else []),
+        *common_args,
+    ]
+    parallel_code = run_pytest(parallel_command)
+
+    logging.info("Running integration and secret-requiring tests serially...")
+    serial_command = [
+        "pytest",
+        "-n",
+        "0",
+        "-m",
+        serial_marker,
+        *coverage_args,
+        *(["--cov-append"] if coverage_args else []),
+        *report_args,
+        *common_args,
+    ]
+    serial_code = run_pytest(serial_command)
+
+    # A pass that selects no tests is not a failure (exit code 5 is pytest.ExitCode.NO_TESTS_COLLECTED). The literal is
+    # used so that this script does not need pytest importable itself.
+    codes = [code for code in (parallel_code, serial_code) if code != 5]
+    return next((code for code in codes if code != 0), 0)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,42 @@
+import os
+
+import pytest
 from dotenv import load_dotenv
 
 load_dotenv()
 
+SECRET_KEYS = (
+    "TEST_EMAIL",
+    "TEST_PASSWORD",
+    "TEST_PRN",
+    "TEST_PHONE",
+    "TEST_NAME",
+    "TEST_SRN",
+    "TEST_PROGRAM",
+    "TEST_BRANCH",
+    "TEST_SEMESTER",
+    "TEST_SECTION",
+    "TEST_CAMPUS_CODE",
+    "TEST_CAMPUS",
+)
+
+
+class Secrets(dict):
+    """Test secrets read from the environment. Looking up a missing one skips only the test that needs it."""
+
+    def __missing__(self, key):
+        pytest.skip(f"Missing environment variable: {key}")
+
+
+@pytest.fixture(scope="session")
+def test_secrets():
+    # Read the test secrets once per session. Only the secrets that are set are kept, so a test is skipped when it
+    # looks up one that is missing rather than when any secret is missing.
+    values = Secrets({key: value for key in SECRET_KEYS if (value := os.getenv(key)) is not None})
+    if "TEST_CAMPUS_CODE" in values:
+        values["TEST_CAMPUS_CODE"] = int(values["TEST_CAMPUS_CODE"])
+    return values
+
 
 def pytest_collection_modifyitems(config, items):
     # Force directory-based test ordering: unit > functional > integration
@@ -12,9 +47,14 @@ def pytest_collection_modifyitems(config, items):
     }
 
     def sort_key(item):
-        for key, value in priority.items():
-            if key in str(item.fspath):
-                return value
-        return 99
+        # Match whole directory names below the rootdir, so that e.g. "unit" does not match inside "community" and the
+        # directories the repo is checked out under do not count
+        parts = item.path.relative_to(config.rootpath).parts
+        return next((value for key, value in priority.items() if key in parts), 99)
 
     items.sort(key=sort_key)
+
+    # Mark integration tests so that scripts/run_tests.py can keep them out of the parallel pass
+    for item in items:
+        if "integration" in item.path.relative_to(config.rootpath).parts:
+            item.add_marker(pytest.mark.integration)
@@ -1,5 +1,3 @@
-import os
-
 import pytest
 
 from app.exceptions.authentication import AuthenticationError
@@ -13,11 +11,9 @@ def pesu_academy():
 
 @pytest.mark.secret_required
 @pytest.mark.asyncio
-async def test_authenticate_success_username_email(pesu_academy: PESUAcademy):
-    email = os.getenv("TEST_EMAIL")
-    password = os.getenv("TEST_PASSWORD")
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
+async def test_authenticate_success_username_email(pesu_academy: PESUAcademy, test_secrets):
+    email = test_secrets["TEST_EMAIL"]
+    password = test_secrets["TEST_PASSWORD"]
 
     result = await pesu_academy.authenticate(email, password, profile=False, fields=None)
     assert result["status"] is True
@@ -27,11 +23,9 @@ async def test_authenticate_success_username_email(pesu_academy: PESUAcademy):
 
 @pytest.mark.secret_required
 @pytest.mark.asyncio
-async def test_authenticate_success_username_prn(pesu_academy: PESUAcademy):
-    prn = os.getenv("TEST_PRN")
-    password = os.getenv("TEST_PASSWORD")
-    assert prn is not None, "TEST_PRN environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
+async def test_authenticate_success_username_prn(pesu_academy: PESUAcademy, test_secrets):
+    prn = test_secrets["TEST_PRN"]
+    password = test_secrets["TEST_PASSWORD"]
 
     result = await pesu_academy.authenticate(prn, password, profile=False, fields=None)
     assert result["status"] is True
@@ -41,11 +35,9 @@ async def test_authenticate_success_username_prn(pesu_academy: PESUAcademy):
 
 @pytest.mark.secret_required
 @pytest.mark.asyncio
-async def test_authenticate_success_username_phone(pesu_academy: PESUAcademy):
-    phone = os.getenv("TEST_PHONE")
-    password = os.getenv("TEST_PASSWORD")
-    assert phone is not None, "TEST_PHONE environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
+async def test_authenticate_success_username_phone(pesu_academy: PESUAcademy, test_secrets):
+    phone = test_secrets["TEST_PHONE"]
+    password = test_secrets["TEST_PASSWORD"]
 
     result = await pesu_academy.authenticate(phone, password, profile=False, fields=None)
     assert result["status"] is True
@@ -55,19 +47,12 @@ async def test_authenticate_success_username_phone(pesu_academy: PESUAcademy):
 
 @pytest.mark.secret_required
 @pytest.mark.asyncio
-async def test_authenticate_with_specific_profile_fields(pesu_academy: PESUAcademy):
-    email = os.getenv("TEST_EMAIL")
-    password = os.getenv("TEST_PASSWORD")
-    prn = os.getenv("TEST_PRN")
-    branch = os.getenv("TEST_BRANCH")
-    campus = os.getenv("TEST_CAMPUS")
-    name = os.getenv("TEST_NAME")
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
-    assert prn is not None, "TEST_PRN environment variable not set"
-    assert branch is not None, "TEST_BRANCH environment variable not set"
-    assert campus is not None, "TEST_CAMPUS environment variable not set"
-    assert name is not None, "TEST_NAME environment variable not set"
+async def test_authenticate_with_specific_profile_fields(pesu_academy: PESUAcademy, test_secrets):
+    email = test_secrets["TEST_EMAIL"]
+    password = test_secrets["TEST_PASSWORD"]
+    prn = test_secrets["TEST_PRN"]
+    branch = test_secrets["TEST_BRANCH"]
+    campus = test_secrets["TEST_CAMPUS"]
 
     fields = ["prn", "branch", "campus"]
     result = await pesu_academy.authenticate(email, password, profile=True, fields=fields)
@@ -89,33 +74,19 @@ async def test_authenticate_with_specific_profile_fields(pesu_academy: PESUAcade
 
 @pytest.mark.secret_required
 @pytest.mark.asyncio
-async def test_authenticate_with_all_profile_fields(pesu_academy: PESUAcademy):
-    name = os.getenv("TEST_NAME")
-    email = os.getenv("TEST_EMAIL")
-    password = os.getenv("TEST_PASSWORD")
-    prn = os.getenv("TEST_PRN")
-    srn = os.getenv("TEST_SRN")
-    program = os.getenv("TEST_PROGRAM")
-    semester = os.getenv("TEST_SEMESTER")
-    section = os.getenv("TEST_SECTION")
-    phone = os.getenv("TEST_PHONE")
-    campus_code = int(os.getenv("TEST_CAMPUS_CODE"))
-    branch = os.getenv("TEST_BRANCH")
-    campus = os.getenv("TEST_CAMPUS")
-
-    assert name is not None, "TEST_NAME environment variable not set"
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
-    assert prn is not None, "TEST_PRN environment variable not set"
-    assert branch is not None, "TEST_BRANCH environment variable not set"
-    assert campus is not None, "TEST_CAMPUS environment variable not set"
-    assert srn is not None, "TEST_SRN environment variable not set"
-    assert program is not None, "TEST_PROGRAM environment variable not set"
-    assert semester is not None, "TEST_SEMESTER environment variable not set"
-    assert section is not None, "TEST_SECTION environment variable not set"
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert phone is not None, "TEST_PHONE environment variable not set"
-    assert campus_code is not None, "TEST_CAMPUS_CODE environment variable not set"
+async def test_authenticate_with_all_profile_fields(pesu_academy: PESUAcademy, test_secrets):
+    name = test_secrets["TEST_NAME"]
+    email = test_secrets["TEST_EMAIL"]
+    password = test_secrets["TEST_PASSWORD"]
+    prn = test_secrets["TEST_PRN"]
+    srn = test_secrets["TEST_SRN"]
+    program = test_secrets["TEST_PROGRAM"]
+    semester = test_secrets["TEST_SEMESTER"]
+    section = test_secrets["TEST_SECTION"]
+    phone = test_secrets["TEST_PHONE"]
+    campus_code = test_secrets["TEST_CAMPUS_CODE"]
+    branch = test_secrets["TEST_BRANCH"]
+    campus = test_secrets["TEST_CAMPUS"]
 
     all_fields = [
         "name",
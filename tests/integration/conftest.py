@@ -0,0 +1,32 @@
+import pytest
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+from app.app import app
+
+unhandled_router = APIRouter()
+
+
+@unhandled_router.get("/raiseUnhandled")
+async def raise_unhandled():
+    raise RuntimeError("Simulated internal server error")
+
+
+app.include_router(unhandled_router)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app, raise_server_exceptions=False) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def full_profile_response(test_secrets, client):
+    # A single login with the full profile, shared by every test that needs it to save upstream round trips
+    payload = {
+        "username": test_secrets["TEST_EMAIL"],
+        "password": test_secrets["TEST_PASSWORD"],
+        "profile": True,
+    }
+    return client.post("/authenticate", json=payload)
@@ -1,33 +1,11 @@
-import os
-
 import pytest
-from fastapi import APIRouter
-from fastapi.testclient import TestClient
-
-from app.app import app
-
-unhandled_router = APIRouter()
-
-
-@unhandled_router.get("/raiseUnhandled")
-async def raise_unhandled():
-    raise RuntimeError("Simulated internal server error")
-
-
-app.include_router(unhandled_router)
-
-
-@pytest.fixture(scope="module")
-def client():
-    with TestClient(app, raise_server_exceptions=False) as client:
-        yield client
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_success_username_email(client):
+def test_integration_authenticate_success_username_email(test_secrets, client):
     payload = {
-        "username": os.getenv("TEST_EMAIL"),
-        "password": os.getenv("TEST_PASSWORD"),
+        "username": test_secrets["TEST_EMAIL"],
+        "password": test_secrets["TEST_PASSWORD"],
         "profile": False,
     }
 
@@ -41,10 +19,10 @@ def test_integration_authenticate_success_username_email(client):
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_success_username_prn(client):
+def test_integration_authenticate_success_username_prn(test_secrets, client):
     payload = {
-        "username": os.getenv("TEST_PRN"),
-        "password": os.getenv("TEST_PASSWORD"),
+        "username": test_secrets["TEST_PRN"],
+        "password": test_secrets["TEST_PASSWORD"],
         "profile": False,
     }
 
@@ -58,10 +36,10 @@ def test_integration_authenticate_success_username_prn(client):
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_success_username_phone(client):
+def test_integration_authenticate_success_username_phone(test_secrets, client):
     payload = {
-        "username": os.getenv("TEST_PHONE"),
-        "password": os.getenv("TEST_PASSWORD"),
+        "username": test_secrets["TEST_PHONE"],
+        "password": test_secrets["TEST_PASSWORD"],
         "profile": False,
     }
 
@@ -75,19 +53,13 @@ def test_integration_authenticate_success_username_phone(client):
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_with_specific_profile_fields(client):
-    email = os.getenv("TEST_EMAIL")
-    password = os.getenv("TEST_PASSWORD")
-    prn = os.getenv("TEST_PRN")
-    branch = os.getenv("TEST_BRANCH")
-    campus = os.getenv("TEST_CAMPUS")
-    name = os.getenv("TEST_NAME")
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
-    assert prn is not None, "TEST_PRN environment variable not set"
-    assert branch is not None, "TEST_BRANCH environment variable not set"
-    assert campus is not None, "TEST_CAMPUS environment variable not set"
-    assert name is not None, "TEST_NAME environment variable not set"
+def test_integration_authenticate_with_specific_profile_fields(test_secrets, client, full_profile_response):
+    email = test_secrets["TEST_EMAIL"]
+    password = test_secrets["TEST_PASSWORD"]
+    prn = test_secrets["TEST_PRN"]
+    branch = test_secrets["TEST_BRANCH"]
+    campus = test_secrets["TEST_CAMPUS"]
+    name = test_secrets["TEST_NAME"]
 
     expected_fields = ["prn", "branch", "campus", "name"]
     payload = {
@@ -114,36 +86,24 @@ def test_integration_authenticate_with_specific_profile_fields(client):
     assert profile["campus"] == campus
     assert profile["name"] == name
     assert "email" not in profile
+    # The filtered profile must be an exact projection of the full profile
+    full_profile = full_profile_response.json()["profile"]
+    assert profile == {field: full_profile[field] for field in expected_fields}
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_with_all_profile_fields(client):
-    name = os.getenv("TEST_NAME")
-    email = os.getenv("TEST_EMAIL")
-    password = os.getenv("TEST_PASSWORD")
-    prn = os.getenv("TEST_PRN")
-    srn = os.getenv("TEST_SRN")
-    program = os.getenv("TEST_PROGRAM")
-    semester = os.getenv("TEST_SEMESTER")
-    section = os.getenv("TEST_SECTION")
-    phone = os.getenv("TEST_PHONE")
-    campus_code = int(os.getenv("TEST_CAMPUS_CODE"))
-    branch = os.getenv("TEST_BRANCH")
-    campus = os.getenv("TEST_CAMPUS")
-
-    assert name is not None, "TEST_NAME environment variable not set"
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert password is not None, "TEST_PASSWORD environment variable not set"
-    assert prn is not None, "TEST_PRN environment variable not set"
-    assert branch is not None, "TEST_BRANCH environment variable not set"
-    assert campus is not None, "TEST_CAMPUS environment variable not set"
-    assert srn is not None, "TEST_SRN environment variable not set"
-    assert program is not None, "TEST_PROGRAM environment variable not set"
-    assert semester is not None, "TEST_SEMESTER environment variable not set"
-    assert section is not None, "TEST_SECTION environment variable not set"
-    assert email is not None, "TEST_EMAIL environment variable not set"
-    assert phone is not None, "TEST_PHONE environment variable not set"
-    assert campus_code is not None, "TEST_CAMPUS_CODE environment variable not set"
+def test_integration_authenticate_with_all_profile_fields(test_secrets, full_profile_response):
+    name = test_secrets["TEST_NAME"]
+    email = test_secrets["TEST_EMAIL"]
+    prn = test_secrets["TEST_PRN"]
+    srn = test_secrets["TEST_SRN"]
+    program = test_secrets["TEST_PROGRAM"]
+    semester = test_secrets["TEST_SEMESTER"]
+    section = test_secrets["TEST_SECTION"]
+    phone = test_secrets["TEST_PHONE"]
+    campus_code = test_secrets["TEST_CAMPUS_CODE"]
+    branch = test_secrets["TEST_BRANCH"]
+    campus = test_secrets["TEST_CAMPUS"]
 
     all_fields = [
         "name",
@@ -159,13 +119,7 @@ def test_integration_authenticate_with_all_profile_fields(client):
         "campus",
     ]
 
-    payload = {
-        "username": email,
-        "password": password,
-        "profile": True,
-    }
-
-    response = client.post("/authenticate", json=payload)
+    response = full_profile_response
     assert response.status_code == 200
     data = response.json()
     assert data["status"] is True
@@ -189,9 +143,9 @@ def test_integration_authenticate_with_all_profile_fields(client):
 
 
 @pytest.mark.secret_required
-def test_integration_authenticate_invalid_password(client):
+def test_integration_authenticate_invalid_password(test_secrets, client):
     payload = {
-        "username": os.getenv("TEST_EMAIL"),
+        "username": test_secrets["TEST_EMAIL"],
         "password": "wrongpass",
         "profile": True,
     }
@@ -1,9 +1,13 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.app import app, main
+from app.app import app, lifespan, main, pesu_academy
 
 
 @pytest.fixture
@@ -27,6 +31,24 @@ def test_authenticate_validation_error(mock_authenticate, client, caplog):
     assert "Validation error on ResponseModel" in caplog.text
 
 
+@patch("app.app.pesu_academy.prefetch_client_with_csrf_token")
+@patch("app.app.pesu_academy.authenticate")
+def test_authenticate_success_response_shape(mock_authenticate, mock_prefetch, client):
+    mock_authenticate.return_value = {
+        "status": True,
+        "message": "Login successful.",
+        "profile": {"name": "Test User", "campus_code": 1},
+    }
+    payload = {"username": "testuser", "password": "testpass", "profile": True}
+    response = client.post("/authenticate", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] is True
+    assert data["message"] == "Login successful."
+    assert data["profile"] == {"name": "Test User", "campus_code": 1}
+    assert data["timestamp"].endswith("+05:30")
+
+
 @patch("app.app.pesu_academy.authenticate")
 def test_authenticate_general_exception(mock_authenticate, client):
     mock_authenticate.side_effect = Exception("Test exception")
@@ -37,6 +59,38 @@ def test_authenticate_general_exception(mock_authenticate, client):
     assert "Internal Server Error" in data["message"]
 
 
+@patch("app.app._csrf_token_refresh_loop", new_callable=AsyncMock)
+def test_authenticate_fetches_one_csrf_page_per_login(mock_refresh_loop, monkeypatch):
+    csrf_page_requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # The login takes longer than the pre-authentication GET, so the next prefetch finishes during the login
+        if request.method == "GET" and request.url.path == "/Academy/":
+            csrf_page_requests.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, content=b'<meta name="csrf-token" content="fake-csrf-token">')
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=b'<meta name="csrf-token" content="new-csrf-token">')
+
+    monkeypatch.setattr(pesu_academy, "_transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(pesu_academy, "_mounts", {})
+
+    async def wait_for_prefetch():
+        if pesu_academy._prefetch_task is not None:
+            await pesu_academy._prefetch_task
+
+    payload = {"username": "testuser", "password": "testpass", "profile": False}
+    with TestClient(app) as client:
+        client.portal.call(wait_for_prefetch)
+        assert len(csrf_page_requests) == 1
+        for logins in range(1, 4):
+            response = client.post("/authenticate", json=payload)
+            assert response.status_code == 200
+            client.portal.call(wait_for_prefetch)
+            # Each login hands out the prefetched client and prefetches exactly one for the next login
+            assert len(csrf_page_requests) == 1 + logins
+
+
 @patch("app.app.argparse.ArgumentParser.parse_args")
 @patch("app.app.logging.basicConfig")
 @patch("app.app.uvicorn.run")
@@ -67,3 +121,27 @@ def test_main_function_debug_mode(mock_run, mock_logging, mock_parse_args):
 
     mock_logging.assert_called_once()
     mock_run.assert_called_once_with("app.app:app", host="127.0.0.1", port=8000, reload=True)
+
+
+@pytest.mark.asyncio
+@patch("app.app.pesu_academy.close_client")
+@patch("app.app.pesu_academy.prefetch_client_with_csrf_token")
+@patch("app.app._csrf_token_refresh_loop")
+async def test_lifespan_builds_openapi_schema(mock_refresh_loop, mock_prefetch, mock_close):
+    app.openapi_schema = None
+    async with lifespan(app):
+        assert app.openapi_schema is not None
+        assert "/authenticate" in app.openapi_schema["paths"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="asyncio.eager_task_factory requires Python 3.12+")
+@patch("app.app.pesu_academy.close_client")
+@patch("app.app.pesu_academy.prefetch_client_with_csrf_token")
+@patch("app.app._csrf_token_refresh_loop")
+async def test_lifespan_uses_eager_task_factory(mock_refresh_loop, mock_prefetch, mock_close):
+    loop = asyncio.get_running_loop()
+    previous_task_factory = loop.get_task_factory()
+    async with lifespan(app):
+        assert loop.get_task_factory() is asyncio.eager_task_factory
+    assert loop.get_task_factory() is previous_task_factory
@@ -17,13 +17,13 @@ def pesu():
 async def test_authenticate_success_no_profile(mock_post, mock_get, pesu):
     # Mock GET home page response with csrf token meta
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get_response.status_code = 200
     mock_get.return_value = mock_get_response
 
     # Mock POST login success response with csrf token meta
     mock_post_response = AsyncMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response.content = b'<meta name="csrf-token" content="new-csrf-token">'
     mock_post.return_value = mock_post_response
 
     result = await pesu.authenticate("user", "pass", profile=False)
@@ -39,11 +39,11 @@ async def test_authenticate_success_no_profile(mock_post, mock_get, pesu):
 @pytest.mark.asyncio
 async def test_authenticate_success_with_profile(mock_get_profile, mock_post, mock_get, pesu):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
 
     mock_post_response = AsyncMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response.content = b'<meta name="csrf-token" content="new-csrf-token">'
     mock_post.return_value = mock_post_response
 
     mock_get_profile.return_value = {
@@ -78,12 +78,12 @@ async def test_authenticate_csrf_fetch_failure(mock_get, pesu):
 @pytest.mark.asyncio
 async def test_authenticate_login_failure(mock_post, mock_get, pesu):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
 
     # Simulate login failure: login form div present
     mock_post_response = AsyncMock()
-    mock_post_response.text = '<div class="login-form">Login error</div>'
+    mock_post_response.content = b'<div class="login-form">Login error</div>'
     mock_post.return_value = mock_post_response
 
     with pytest.raises(AuthenticationError):
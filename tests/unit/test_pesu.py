@@ -1,6 +1,9 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
+import httpx
 import pytest
+from selectolax.lexbor import LexborHTMLParser
 
 from app.exceptions.authentication import (
     AuthenticationError,
@@ -42,7 +45,7 @@ async def test_get_profile_information_non_200_status(mock_get, pesu):
 @pytest.mark.asyncio
 async def test_authenticate_csrf_token_not_found(mock_get, pesu):
     mock_response = AsyncMock()
-    mock_response.text = "<html><head></head><body>No CSRF token here</body></html>"
+    mock_response.content = b"<html><head></head><body>No CSRF token here</body></html>"
     mock_get.return_value = mock_response
     with pytest.raises(CSRFTokenError):
         result = await pesu.authenticate("testuser", "testpass")
@@ -55,7 +58,7 @@ async def test_authenticate_csrf_token_not_found(mock_get, pesu):
 @pytest.mark.asyncio
 async def test_authenticate_post_request_failure(mock_post, mock_get, pesu):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
     mock_post.side_effect = CSRFTokenError("POST request failed")
     with pytest.raises(CSRFTokenError):
@@ -70,10 +73,10 @@ async def test_authenticate_post_request_failure(mock_post, mock_get, pesu):
 async def test_authenticate_csrf_token_missing_after_login(mock_post, mock_get, pesu):
     """Test authenticate when CSRF token is missing after successful login."""
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
     mock_post_response = AsyncMock()
-    mock_post_response.text = "<html><body>Login successful but no CSRF token</body></html>"
+    mock_post_response.content = b"<html><body>Login successful but no CSRF token</body></html>"
     mock_post.return_value = mock_post_response
     with pytest.raises(CSRFTokenError):
         result = await pesu.authenticate("testuser", "testpass")
@@ -92,10 +95,10 @@ async def test_authenticate_with_profile_field_filtering(
     pesu,
 ):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
     mock_post_response = AsyncMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response.content = b'<meta name="csrf-token" content="new-csrf-token">'
     mock_post.return_value = mock_post_response
     mock_get_profile.return_value = {
         "name": "Test User",
@@ -125,10 +128,10 @@ async def test_authenticate_with_profile_no_field_filtering(
     pesu,
 ):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
     mock_post_response = AsyncMock()
-    mock_post_response.text = '<meta name="csrf-token" content="new-csrf-token">'
+    mock_post_response.content = b'<meta name="csrf-token" content="new-csrf-token">'
     mock_post.return_value = mock_post_response
     mock_get_profile.return_value = dict.fromkeys(PESUAcademy.DEFAULT_FIELDS, "test_value")
     result = await pesu.authenticate("testuser", "testpass", profile=True, fields=None)
@@ -138,7 +141,31 @@ async def test_authenticate_with_profile_no_field_filtering(
         assert result["profile"][field] == "test_value"
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.httpx.AsyncClient.get")
+@patch("app.pesu.httpx.AsyncClient.post")
+@patch("app.pesu.PESUAcademy.get_profile_information")
+@pytest.mark.asyncio
+async def test_authenticate_with_all_default_fields_in_any_order(
+    mock_get_profile,
+    mock_post,
+    mock_get,
+    pesu,
+):
+    mock_get_response = AsyncMock()
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get.return_value = mock_get_response
+    mock_post_response = AsyncMock()
+    mock_post_response.content = b'<meta name="csrf-token" content="new-csrf-token">'
+    mock_post.return_value = mock_post_response
+    mock_get_profile.return_value = dict.fromkeys(PESUAcademy.DEFAULT_FIELDS, "test_value")
+    result = await pesu.authenticate(
+        "testuser", "testpass", profile=True, fields=list(reversed(PESUAcademy.DEFAULT_FIELDS))
+    )
+    assert result["status"] is True
+    assert result["profile"] == dict.fromkeys(PESUAcademy.DEFAULT_FIELDS, "test_value")
+
+
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
 async def test_get_profile_information_profile_parse_error(mock_get, mock_html_parser, pesu):
@@ -158,31 +185,61 @@ async def test_get_profile_information_profile_parse_error(mock_get, mock_html_p
         await pesu.get_profile_information(client, "testuser")
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.post")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
 async def test_authenticate_login_form_present(mock_get, mock_post, mock_html_parser, pesu):
     mock_get_response = MagicMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get_response.status_code = 200
     mock_get.return_value = mock_get_response
-    mock_soup_csrf = MagicMock()
-    mock_soup_csrf.css_first.side_effect = lambda selector: (
-        MagicMock(attributes={"content": "fake-csrf-token"}) if selector == "meta[name='csrf-token']" else None
-    )
     mock_soup_login = MagicMock()
     mock_soup_login.css_first.side_effect = lambda selector: (MagicMock() if selector == "div.login-form" else None)
-    mock_html_parser.side_effect = [mock_soup_csrf, mock_soup_login]
+    # The pre-authentication CSRF token is read without parsing, so only the login response is parsed
+    mock_html_parser.side_effect = [mock_soup_login]
     mock_post_response = MagicMock()
-    mock_post_response.text = "<html><body><div class='login-form'></div></body></html>"
+    mock_post_response.content = b"<html><body><div class='login-form'></div></body></html>"
     mock_post_response.status_code = 200
     mock_post.return_value = mock_post_response
     with pytest.raises(AuthenticationError):
         await pesu.authenticate("testuser", "testpass")
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
+@patch("app.pesu.httpx.AsyncClient.post")
+@patch("app.pesu.httpx.AsyncClient.get")
+@pytest.mark.asyncio
+async def test_authenticate_success_does_not_parse_response(mock_get, mock_post, mock_html_parser, pesu):
+    mock_get_response = MagicMock()
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get.return_value = mock_get_response
+    mock_post_response = MagicMock()
+    mock_post_response.content = b'<html><head><meta name="csrf-token" content="new-csrf-token"></head></html>'
+    mock_post.return_value = mock_post_response
+    result = await pesu.authenticate("testuser", "testpass")
+    assert result["status"] is True
+    mock_html_parser.assert_not_called()
+
+
+@patch("app.pesu.httpx.AsyncClient.post")
+@patch("app.pesu.httpx.AsyncClient.get")
+@pytest.mark.asyncio
+async def test_authenticate_login_form_marker_without_form(mock_get, mock_post, pesu):
+    mock_get_response = MagicMock()
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get.return_value = mock_get_response
+    mock_post_response = MagicMock()
+    mock_post_response.content = (
+        b'<html><head><meta name="csrf-token" content="new-csrf-token"></head>'
+        b'<body><script>var form = "login-form";</script></body></html>'
+    )
+    mock_post.return_value = mock_post_response
+    result = await pesu.authenticate("testuser", "testpass")
+    assert result["status"] is True
+
+
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.post")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
@@ -193,10 +250,10 @@ async def test_authenticate_csrf_token_missing_after_login_strict(
     pesu,
 ):
     mock_get_response = AsyncMock()
-    mock_get_response.text = '<meta name="csrf-token" content="fake-csrf-token">'
+    mock_get_response.content = b'<meta name="csrf-token" content="fake-csrf-token">'
     mock_get.return_value = mock_get_response
     mock_post_response = AsyncMock()
-    mock_post_response.text = "<html><body>Login successful but no CSRF token</body></html>"
+    mock_post_response.content = b"<html><body>Login successful but no CSRF token</body></html>"
     mock_post.return_value = mock_post_response
     mock_soup = MagicMock()
 
@@ -213,7 +270,7 @@ async def test_authenticate_csrf_token_missing_after_login_strict(
         await pesu.authenticate("testuser", "testpass")
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
 async def test_get_profile_information_unknown_campus_code(
@@ -234,14 +291,7 @@ async def test_get_profile_information_unknown_campus_code(
         value_label = MagicMock()
         value_label.text.return_value = value
 
-        def css_first(selector):
-            if selector == "label.lbl-title-light":
-                return key_label
-            if selector == "label.lbl-title-light + label":
-                return value_label
-            return None
-
-        div.css_first.side_effect = css_first
+        div.css.return_value = [key_label, value_label]
         return div
 
     form_group_elems = [
@@ -294,7 +344,7 @@ async def test_get_profile_information_unknown_campus_code(
         )
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
 async def test_get_profile_information_campus_code_rr_ec(mock_get, mock_html_parser, pesu):
@@ -311,14 +361,7 @@ async def test_get_profile_information_campus_code_rr_ec(mock_get, mock_html_par
         value_label = MagicMock()
         value_label.text.return_value = value
 
-        def css_first(selector):
-            if selector == "label.lbl-title-light":
-                return key_label
-            if selector == "label.lbl-title-light + label":
-                return value_label
-            return None
-
-        div.css_first.side_effect = css_first
+        div.css.return_value = [key_label, value_label]
         return div
 
     # Subcase 1: PES1... (RR campus)
@@ -369,7 +412,7 @@ async def test_get_profile_information_campus_code_rr_ec(mock_get, mock_html_par
     assert profile_ec["campus"] == "EC"
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.get")
 @pytest.mark.asyncio
 async def test_get_profile_information_no_profile_data(mock_get, mock_html_parser, pesu):
@@ -393,7 +436,7 @@ async def test_get_profile_information_no_profile_data(mock_get, mock_html_parse
 
 
 
-@patch("app.pesu.HTMLParser")
+@patch("app.pesu.LexborHTMLParser")
 @patch("app.pesu.httpx.AsyncClient.get")
 @patch("app.pesu.PESUAcademy._extract_and_update_profile", new_callable=AsyncMock)
 @pytest.mark.asyncio
@@ -427,7 +470,7 @@ async def test_get_profile_information_empty_profile_triggers_final_parse_error(
 @pytest.mark.asyncio
 async def test_extract_and_update_profile_key_label_missing(pesu):
     node = MagicMock()
-    node.css_first.return_value = None  # key label missing
+    node.css.return_value = []  # key label missing
     profile = {}
     with pytest.raises(ProfileParseError) as exc_info:
         await pesu._extract_and_update_profile(node, 0, profile)
@@ -440,14 +483,7 @@ async def test_extract_and_update_profile_value_label_missing(pesu):
     key_label = MagicMock()
     key_label.text.return_value = "Name"
 
-    def css_first(selector):
-        if selector == "label.lbl-title-light":
-            return key_label
-        if selector == "label.lbl-title-light + label":
-            return None  # value label missing
-        return None
-
-    node.css_first.side_effect = css_first
+    node.css.return_value = [key_label]  # value label missing
     profile = {}
     with pytest.raises(ProfileParseError) as exc_info:
         await pesu._extract_and_update_profile(node, 0, profile)
@@ -462,22 +498,230 @@ async def test_extract_and_update_profile_unknown_key(pesu):
     value_label = MagicMock()
     value_label.text.return_value = "SomeValue"
 
-    def css_first(selector):
-        if selector == "label.lbl-title-light":
-            return key_label
-        if selector == "label.lbl-title-light + label":
-            return value_label
-        return None
-
-    node.css_first.side_effect = css_first
+    node.css.return_value = [key_label, value_label]
     profile = {}
     with pytest.raises(ProfileParseError) as exc_info:
         await pesu._extract_and_update_profile(node, 0, profile)
     assert "Unknown key: 'UnknownKey' in the profile page" in str(exc_info.value)
 
 
-def test_default_fields_is_list():
-    assert isinstance(PESUAcademy.DEFAULT_FIELDS, list)
+
+def test_extract_and_update_profile_parses_real_markup(pesu):
+    html = (
+        b'<div class="form-group"><label class="lbl-title-light">Name</label>'
+        b"\n  <label>John Doe</label></div>"
+    )
+    node = LexborHTMLParser(html).css_first("div.form-group")
+    profile = {}
+    pesu._extract_and_update_profile(node, 0, profile)
+    assert profile == {"name": "John Doe"}
+
+
+@pytest.mark.asyncio
+async def test_get_profile_information_decodes_page_charset(pesu):
+    rows = [
+        ("Name", "Jos\u00e9 D\u00edaz"),
+        ("PESU Id", "PES1201800001"),
+        ("SRN", "PES1UG20CS001"),
+        ("Program", "Bachelor of Technology"),
+        ("Branch", "Computer Science and Engineering"),
+        ("Semester", "Sem-8"),
+        ("Section", "Section A"),
+    ]
+    html = '<div class="elem-info-wrapper">{}</div>'.format(
+        "".join(
+            f'<div class="form-group"><label class="lbl-title-light">{key}</label><label>{value}</label></div>'
+            for key, value in rows
+        )
+    )
+    client = AsyncMock()
+    client.get.return_value = httpx.Response(
+        200,
+        content=html.encode("iso-8859-1"),
+        headers={"Content-Type": "text/html; charset=ISO-8859-1"},
+    )
+    profile = await pesu.get_profile_information(client, "testuser")
+    assert profile["name"] == "Jos\u00e9 D\u00edaz"
+
+
+@pytest.mark.asyncio
+async def test_fetched_clients_share_connection_pool(pesu):
+    handled = []
+
+    def handler(request):
+        handled.append(request)
+        return httpx.Response(200, content=b'<meta name="csrf-token" content="fake-csrf-token">')
+
+    pesu._transport = httpx.MockTransport(handler)
+    pesu._mounts = {}
+    client_a, token_a = await pesu._fetch_new_client_with_csrf_token()
+    client_b, token_b = await pesu._fetch_new_client_with_csrf_token()
+    assert token_a == token_b == "fake-csrf-token"
+    assert client_a is not client_b
+    assert client_a.cookies is not client_b.cookies
+    assert len(handled) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_client_with_csrf_token_waits_for_in_flight_prefetch(pesu):
+    fetched = [(MagicMock(), f"csrf-token-{i}") for i in range(3)]
+    with patch.object(pesu, "_fetch_new_client_with_csrf_token", new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.side_effect = fetched
+        _, token_a = await pesu._get_client_with_csrf_token()
+        _, token_b = await pesu._get_client_with_csrf_token()
+        await pesu._prefetch_task
+    assert token_a == "csrf-token-0"
+    assert token_b == "csrf-token-1"
+    assert mock_fetch.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_schedule_prefetch_reuses_in_flight_task(pesu):
+    with patch.object(pesu, "_prefetch_client_with_csrf_token", new_callable=AsyncMock) as mock_prefetch:
+        task_a = pesu._schedule_prefetch_client_with_csrf_token()
+        task_b = pesu._schedule_prefetch_client_with_csrf_token()
+        await task_a
+    assert task_a is task_b
+    mock_prefetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_client_with_csrf_token_joins_in_flight_prefetch(pesu):
+    with patch.object(pesu, "_prefetch_client_with_csrf_token", new_callable=AsyncMock) as mock_prefetch:
+        pesu._schedule_prefetch_client_with_csrf_token()
+        await pesu.prefetch_client_with_csrf_token()
+    mock_prefetch.assert_awaited_once()
+
+
+@patch("app.pesu.LexborHTMLParser")
+@patch("app.pesu.httpx.AsyncClient.get")
+@pytest.mark.asyncio
+async def test_fetch_new_client_reads_csrf_token_without_parsing(mock_get, mock_html_parser, pesu):
+    mock_get_response = MagicMock()
+    mock_get_response.content = b'<head><meta name="csrf-token" content="a1b2-c3d4"/></head>'
+    mock_get.return_value = mock_get_response
+    _, csrf_token = await pesu._fetch_new_client_with_csrf_token()
+    assert csrf_token == "a1b2-c3d4"
+    mock_html_parser.assert_not_called()
+
+
+@patch("app.pesu.httpx.AsyncClient.get")
+@pytest.mark.asyncio
+async def test_fetch_new_client_falls_back_to_parser_for_csrf_token(mock_get, pesu):
+    mock_get_response = MagicMock()
+    mock_get_response.content = b'<head><meta content="a1b2-c3d4" name="csrf-token"></head>'
+    mock_get.return_value = mock_get_response
+    _, csrf_token = await pesu._fetch_new_client_with_csrf_token()
+    assert csrf_token == "a1b2-c3d4"
+
+
+@pytest.mark.asyncio
+async def test_close_client_cancels_in_flight_prefetch(pesu):
+    prefetch_started = asyncio.Event()
+
+    async def hanging_prefetch():
+        prefetch_started.set()
+        await asyncio.Event().wait()
+
+    with (
+        patch.object(pesu, "_prefetch_client_with_csrf_token", new=hanging_prefetch),
+        patch.object(pesu._transport, "aclose", new_callable=AsyncMock),
+    ):
+        task = pesu._schedule_prefetch_client_with_csrf_token()
+        await prefetch_started.wait()
+        await pesu.close_client()
+    assert task.cancelled()
+    assert task.get_name() == "csrf-prefetch"
+    assert pesu._prefetch_task is None
+
+
+@pytest.mark.asyncio
+async def test_close_client_closes_connection_pool(pesu):
+    pesu._client = MagicMock()
+    pesu._csrf_token = "fake-csrf-token"
+    with patch.object(pesu._transport, "aclose", new_callable=AsyncMock) as mock_aclose:
+        await pesu.close_client()
+    mock_aclose.assert_awaited_once()
+    assert pesu._client is None
+    assert pesu._csrf_token is None
+
+
+def test_connection_pool_limits_are_configurable():
+    with patch("app.pesu.httpx.AsyncHTTPTransport") as mock_transport:
+        PESUAcademy(max_connections=8, max_keepalive_connections=4)
+    assert mock_transport.call_args_list[0] == call(limits=httpx.Limits(max_connections=8, max_keepalive_connections=4))
+
+
+@pytest.mark.asyncio
+async def test_fetched_clients_honour_proxy_environment(monkeypatch):
+    for name in ("HTTP_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example:3128")
+    monkeypatch.setenv("NO_PROXY", "internal.example")
+    handled, closed = [], []
+
+    def make_transport(proxy=None, limits=None):
+        # Stand-in for a pooled transport that records which route handled each request
+        route = proxy or "direct"
+
+        def handler(request):
+            handled.append((route, request.url.host))
+            return httpx.Response(200, content=b'<meta name="csrf-token" content="fake-csrf-token">')
+
+        transport = httpx.MockTransport(handler)
+        transport.aclose = AsyncMock(side_effect=lambda: closed.append(route))
+        return transport
+
+    with patch("app.pesu.httpx.AsyncHTTPTransport", side_effect=make_transport):
+        pesu = PESUAcademy()
+    client, token = await pesu._fetch_new_client_with_csrf_token()
+    await client.get("https://internal.example/")
+    assert token == "fake-csrf-token"
+    assert handled == [("http://proxy.example:3128", "www.pesuacademy.com"), ("direct", "internal.example")]
+    await pesu.close_client()
+    assert sorted(closed) == ["direct", "http://proxy.example:3128"]
+
+
+def test_get_proxy_mount_urls_no_proxy_wildcard_disables_proxies(monkeypatch):
+    monkeypatch.setattr(
+        "app.pesu.urllib.request.getproxies",
+        lambda: {"https": "proxy.example:3128", "no": "*"},
+    )
+    assert PESUAcademy._get_proxy_mount_urls() == {}
+
+
+def test_get_proxy_mount_urls_no_proxy_hosts(monkeypatch):
+    monkeypatch.setattr(
+        "app.pesu.urllib.request.getproxies",
+        lambda: {"https": "proxy.example:3128", "no": "internal.example, 10.0.0.1,::1,localhost"},
+    )
+    assert PESUAcademy._get_proxy_mount_urls() == {
+        "https://": "http://proxy.example:3128",
+        "all://*internal.example": None,
+        "all://10.0.0.1": None,
+        "all://[::1]": None,
+        "all://localhost": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_parse_html_small_document_parsed_inline():
+    with patch("app.pesu.asyncio.to_thread", new_callable=AsyncMock) as mock_to_thread:
+        soup = await PESUAcademy._parse_html(b'<meta name="csrf-token" content="fake-csrf-token">')
+    mock_to_thread.assert_not_awaited()
+    assert soup.css_first("meta[name='csrf-token']").attributes["content"] == "fake-csrf-token"
+
+
+@pytest.mark.asyncio
+async def test_parse_html_large_document_parsed_in_thread():
+    content = b"<html><body>" + b"x" * 200_000 + b"</body></html>"
+    with patch("app.pesu.asyncio.to_thread", new_callable=AsyncMock) as mock_to_thread:
+        await PESUAcademy._parse_html(content)
+    mock_to_thread.assert_awaited_once_with(LexborHTMLParser, content)
+
+
+def test_default_fields_is_tuple():
+    assert isinstance(PESUAcademy.DEFAULT_FIELDS, tuple)
     assert "prn" in PESUAcademy.DEFAULT_FIELDS
     assert "name" in PESUAcademy.DEFAULT_FIELDS
     assert "srn" in PESUAcademy.DEFAULT_FIELDS
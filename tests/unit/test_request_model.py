@@ -110,3 +110,11 @@ def test_validate_username_strips_whitespace():
 def test_validate_password_strips_whitespace():
     model = RequestModel(username="testuser", password="  testpass  ")
     assert model.password == "testpass"
+
+
+def test_request_model_is_frozen():
+    model = RequestModel(username="testuser", password="testpass")
+    with pytest.raises(ValidationError) as exc_info:
+        model.username = "otheruser"
+
+    assert exc_info.value.errors()[0]["type"] == "frozen_instance"